@@ -0,0 +1,231 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from io import BytesIO
+from rapidfuzz import process, fuzz
+import re
+
+_NAME_RE = re.compile(r"[^a-zA-Z\s]+")
+
+DG_FIELDS = ['DG_MakeCut%', 'DG_Top20%', 'DG_Top10%', 'DG_Top5%', 'DG_Win%']
+# Columns added by compute_ownership, in the order _ownership_kernel returns them
+OWNERSHIP_COLS = ['RawBaseOwn%', 'DG_Composite', 'RawDGOwn%', 'PreElimOwn%', 'FinalOwn%']
+
+def load_data(file_bytes: bytes) -> pd.DataFrame:
+    # Parquet files start with the PAR1 magic; anything else is parsed as CSV
+    if file_bytes[:4] == b'PAR1':
+        return pd.read_parquet(BytesIO(file_bytes), engine='pyarrow', dtype_backend='pyarrow')
+    return pd.read_csv(BytesIO(file_bytes), engine='pyarrow', dtype_backend='pyarrow')
+
+@st.cache_data
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    buf = BytesIO()
+    pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+    return buf.getvalue()
+
+def normalize_series(s: pd.Series) -> pd.Series:
+    clean = (s.astype('string[pyarrow]').fillna("")
+              .str.replace(_NAME_RE, "", regex=True)
+              .str.lower())
+    # Token sorting is the only Python-level step, so run it once per distinct name
+    sorted_names = {name: " ".join(sorted(name.split())) for name in clean.unique()}
+    return clean.map(sorted_names)
+
+
+def find_name_column(df: pd.DataFrame) -> str:
+    candidates = [col for col in df.columns if col.lower() in ['name', 'golfer', 'player', 'player name']]
+    return candidates[0] if candidates else df.columns[0]
+
+
+def canonical_column(col: str):
+    col_lc = col.lower()
+    # RG fields
+    if col_lc == 'salary':
+        return 'Salary'
+    elif 'ceil' in col_lc:
+        return 'Ceiling'
+    elif re.search(r'\b(fpts|proj[_ ]?pt)s?\b', col_lc):
+        return 'RG_ProjPts'
+    elif re.search(r'\b(proj[_ ]?own|ownership)\b', col_lc):
+        return 'RG_Ownership%'
+    # DG fields
+    elif col_lc in ['win', 'win%']:
+        return 'DG_Win%'
+    elif 'top' in col_lc and '20' in col_lc:
+        return 'DG_Top20%'
+    elif 'top' in col_lc and '10' in col_lc:
+        return 'DG_Top10%'
+    elif 'top' in col_lc and '5' in col_lc:
+        return 'DG_Top5%'
+    elif 'make' in col_lc and 'cut' in col_lc:
+        return 'DG_MakeCut%'
+    return None
+
+
+def detect_and_rename_columns(df: pd.DataFrame) -> pd.DataFrame:
+    # Only the first column for each field is renamed (RG precedes its _dg twin in a merged
+    # raw file), so every canonical name selects a single column downstream
+    rename_map = {}
+    for col in df.columns:
+        field = canonical_column(col)
+        if field is not None and field not in rename_map.values():
+            rename_map[col] = field
+    return df.rename(columns=rename_map)
+
+
+def fuzzy_match(rg_norms: pd.Series, dg_norms: np.ndarray) -> np.ndarray:
+    # Returns the position of each RG row's matching DG row, or -1 if none.
+    # Work on distinct RG names and broadcast back through the factor codes.
+    # Names that already agree exactly after normalization skip the scorer;
+    # only the residual is scored against every DG name in one multithreaded pass.
+    # The score cutoff lets RapidFuzz skip pairs whose lengths already rule out 80
+    codes, uniques = pd.factorize(rg_norms)
+    uniques = uniques.to_numpy(dtype=object)
+    dg_index = pd.Index(dg_norms)
+    first = np.flatnonzero(~dg_index.duplicated())
+    pos = dg_index[first].get_indexer(uniques)
+    # Index only the hits: first is empty when the DG file has no rows
+    matched = np.full(len(uniques), -1, dtype=np.intp)
+    hit = pos >= 0
+    matched[hit] = first[pos[hit]]
+
+    residual = ~hit
+    if residual.any() and len(dg_norms):
+        scores = process.cdist(uniques[residual], dg_norms,
+                               scorer=fuzz.token_sort_ratio, score_cutoff=80,
+                               workers=-1, dtype=np.uint8)
+        best = scores.argmax(axis=1)
+        best_score = scores[np.arange(len(scores)), best]
+        matched[residual] = np.where(best_score >= 80, best, -1)
+    return matched[codes]
+
+
+def fuzzy_merge(rg_df: pd.DataFrame, dg_df: pd.DataFrame) -> pd.DataFrame:
+    # Step 2: Fuzzy merge on normalized names
+    best = fuzzy_match(normalize_series(rg_df['Name']),
+                       normalize_series(dg_df['Name']).to_numpy())
+    found = best >= 0
+    # Line each matched RG row up with its DG row by position; no join keys to hash
+    rg_sel = rg_df[found].reset_index(drop=True)
+    dg_sel = dg_df.iloc[best[found]].reset_index(drop=True)
+    dg_sel = dg_sel.rename(columns={c: f"{c}_dg" for c in dg_sel.columns if c in rg_sel.columns})
+    return pd.concat([rg_sel, dg_sel], axis=1)
+
+
+@st.cache_data
+def build_merged(rg_bytes: bytes, dg_bytes: bytes) -> pd.DataFrame:
+    # Load data
+    rg_df = load_data(rg_bytes) if rg_bytes is not None else None
+    dg_df = load_data(dg_bytes) if dg_bytes is not None else None
+
+    # If only merged raw provided, set both to same
+    if rg_df is not None and dg_df is None:
+        dg_df = rg_df.copy()
+    # If only DG provided
+    if dg_df is not None and rg_df is None:
+        rg_df = dg_df.copy()
+
+    # Detect name cols and unify
+    rg_name_col = find_name_column(rg_df)
+    dg_name_col = find_name_column(dg_df)
+    rg_df = rg_df.rename(columns={rg_name_col: 'Name'})
+    dg_df = dg_df.rename(columns={dg_name_col: 'Name'})
+    # Only the DG columns the SOP scores on (raw or already canonical headers) are carried
+    # through the join
+    dg_df = dg_df[['Name'] + [c for c in dg_df.columns
+                              if c in DG_FIELDS or canonical_column(c) in DG_FIELDS]]
+    # Arrow-backed names for matching and every downstream step instead of boxed Python strs
+    rg_df['Name'] = rg_df['Name'].astype('string[pyarrow]')
+    dg_df['Name'] = dg_df['Name'].astype('string[pyarrow]')
+
+    return fuzzy_merge(rg_df, dg_df)
+
+
+def minmax(a):
+    # Skips NaN and returns NaN bounds for empty input, like the pandas reductions it replaced
+    if a.size == 0:
+        return np.nan, np.nan
+    a = np.ascontiguousarray(a)
+    return np.nanmin(a), np.nanmax(a)
+
+
+def minmax_norm(a: np.ndarray) -> np.ndarray:
+    lo, hi = minmax(a)
+    return (a - lo) / (hi - lo)
+
+
+def quantile(a: np.ndarray, q: float) -> float:
+    # np.nanquantile's linear interpolation from one O(N) partition instead of a full sort
+    a = a[~np.isnan(a)]
+    if a.size == 0:
+        return np.nan
+    pos = q * (a.size - 1)
+    k = int(pos)
+    part = np.partition(a, k)
+    if k + 1 == a.size:
+        return part[k]
+    # Everything past k is >= part[k], so the next order statistic is its minimum
+    return part[k] + (pos - k) * (part[k + 1:].min() - part[k])
+
+
+def eliminate_and_rescale(pre: np.ndarray) -> np.ndarray:
+    # Drop the bottom 20%, map survivors onto 0.7-22.2 and rescale to 600
+    mask = pre > quantile(pre, 0.2)
+    # No survivors (e.g. a one-row slate): everyone is eliminated and Step 7 is empty
+    if not mask.any():
+        return np.zeros_like(pre)
+    mapped = 0.7 + 21.5 * minmax_norm(pre[mask])
+    mapped *= 600.0 / mapped.sum()
+    final = np.zeros_like(pre)
+    final[mask] = mapped
+    return final
+
+
+def _ownership_kernel(salary: np.ndarray, dg_mat: np.ndarray):
+    # Step 3: Salary-Driven Base Ownership
+    raw_base = 0.5 + 19.5 * minmax_norm(salary)
+
+    # Step 4: DG Composite
+    dg_comp = np.nanmean(dg_mat, axis=1)
+    raw_dg = 0.5 + 19.5 * minmax_norm(dg_comp)
+
+    # Step 5: Pre-Elimination
+    pre = 0.5 * (raw_base + raw_dg)
+
+    # Step 6: Elimination & Rescaling
+    final = eliminate_and_rescale(pre)
+
+    return raw_base, dg_comp, raw_dg, pre, final
+
+
+@st.cache_data
+def compute_ownership(df: pd.DataFrame) -> pd.DataFrame:
+    # Steps 3-6 run in one kernel on plain float32 arrays (the ownership math has
+    # no use for double precision). The results are packed column-by-column into one
+    # preallocated buffer, so they join the frame as a single float32 block
+    salary = df['Salary'].to_numpy(np.float32)
+    dg_mat = df[DG_FIELDS].to_numpy(np.float32, na_value=np.nan)
+    out = np.empty((len(df), len(OWNERSHIP_COLS)), dtype=np.float32, order='F')
+    for j, values in enumerate(_ownership_kernel(salary, dg_mat)):
+        out[:, j] = values
+
+    own = pd.DataFrame(out, columns=OWNERSHIP_COLS, index=df.index)
+    return pd.concat([df.drop(columns=OWNERSHIP_COLS, errors='ignore'), own], axis=1)
+
+
+def build_scorecard(df: pd.DataFrame) -> pd.DataFrame:
+    # Step 7: Prep Final Scorecard (scorecard column -> source column), taken in one masked
+    # selection and then relabelled
+    scorecard_cols = {
+        'Name': 'Name',
+        'Salary': 'Salary',
+        'Ceiling': 'Ceiling',
+        'RG_ProjPts': 'RG_ProjPts',
+        'DG_Composite': 'DG_Composite',
+        'Projected_Ownership%': 'RG_Ownership%',
+        'GTO_Ownership%': 'FinalOwn%',
+    }
+    survivors = df['FinalOwn%'] > 0
+    return df.loc[survivors, list(scorecard_cols.values())].set_axis(list(scorecard_cols), axis=1)